@@ -1,27 +1,37 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from utils.corpus_repo import load_corpus
+from utils.corpus_repo import load_model
 from services.viterby_tagger import ViterbiTagger
 from services.evaluate import evaluate_model
 from services.language_check import speaking_ability_score
+from services.conversation import iter_scored_pairs, resolve_fields, split_messages, summarize
+from utils.responses import FastJSONResponse, ndjson_response
 import logging
+import os
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Kompaksi model opsional, mis. CORPUS_MIN_COUNT=2 CORPUS_DTYPE=float16.
+# CORPUS_MODEL menunjuk ke file .npz hasil `python -m services.evaluate ... --save`
+# sehingga model dimuat langsung tanpa membangun dict count dari corpus.
+corpus_model = os.environ.get("CORPUS_MODEL")
+corpus_min_count = int(os.environ["CORPUS_MIN_COUNT"]) if os.environ.get("CORPUS_MIN_COUNT") else None
+corpus_dtype = os.environ.get("CORPUS_DTYPE", "float32")
+
 try:
     corpus_file = "corpus.json"
-    stats = load_corpus(corpus_file)
+    stats = load_model(corpus_model or corpus_file, corpus_min_count, corpus_dtype)
     tag_set = set(stats.tag_count.keys())
 except Exception as e:
     logger.error(f"Failed to initialize corpus: {e}")
     stats = None
     tag_set = set()
 
-app = FastAPI(title="NLP Backend API", version="1.0.0")
+app = FastAPI(title="NLP Backend API", version="1.0.0", default_response_class=FastJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -85,91 +95,73 @@ def evaluate_speaking(input_data: SpeakingInput):
         if not stats or not tag_set:
             raise HTTPException(status_code=503, detail="Service not initialized")
             
-        return speaking_ability_score(
+        return FastJSONResponse(content=speaking_ability_score(
             question=input_data.question,
             user_answer=input_data.user_answer,
             stats =stats,          # Ditambahkan
             tag_set=tag_set       # Ditambahkan
-        )
+        ))
         
     except Exception as e:
         logger.error(f"Evaluation error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
     
+def _stream_conversation(pairs, totals):
+    """Baris NDJSON: satu per pasangan, diakhiri baris ringkasan"""
+    try:
+        for row in pairs:
+            yield row
+        yield summarize(totals)
+    except Exception as e:
+        logger.error(f"Conversation stream error: {str(e)}", exc_info=True)
+        yield {"success": False, "error": str(e)}
+
 @app.post("/evaluate-conversation")
-def evaluate_conversation(input_data: ConversationInput):
+def evaluate_conversation(input_data: ConversationInput, fields: Optional[str] = None,
+                          compact: bool = False, stream: bool = False):
+    """
+    `fields` (comma-separated) or `compact` trims each detailed result;
+    `stream=true` returns NDJSON, one line per pair followed by the summary.
+    """
     try:
         if not stats or not tag_set:
             raise HTTPException(status_code=503, detail="Service not initialized")
             
         # Pisahkan pesan bot dan user
-        bot_messages = [m['message'] for m in input_data.messages if m['role'] == 'bot']
-        user_messages = [m['message'] for m in input_data.messages if m['role'] == 'user']
+        bot_messages, user_messages = split_messages(input_data.messages)
         
         if len(bot_messages) != len(user_messages):
             raise HTTPException(status_code=400, detail="Jumlah pertanyaan dan jawaban tidak sama")
         
-        results = []
-        total_similarity = 0
-        total_grammar = 0
-        
+        selected_fields = resolve_fields(fields, compact)
+        totals = {}
         # Evaluasi setiap pasangan pertanyaan-jawaban
-        for question, answer in zip(bot_messages, user_messages):
-            result = speaking_ability_score(
-                question=question,
-                user_answer=answer,
-                stats=stats,
-                tag_set=tag_set
-            )
-            
-            # Pastikan result memiliki nilai default jika None
-            similarity = result.get('similarity', 0)
-            grammar = result.get('grammar_score', 0)
-            
-            results.append({
-                'question': question,
-                'user_answer': answer,
-                'similarity': similarity,
-                'grammar_score': grammar,
-                'grammar_errors': result.get('grammar_errors', []),
-                'suggestion': result.get('suggestion', ''),
-                'pos_tags': result.get('pos_tags', [])
-            })
-            
-            total_similarity += similarity
-            total_grammar += grammar
+        pairs = iter_scored_pairs(bot_messages, user_messages, stats, tag_set, selected_fields, totals)
         
-        # Hitung rata-rata
-        pair_count = max(1, len(results))  # Hindari division by zero
-        avg_similarity = total_similarity / pair_count
-        avg_grammar = total_grammar / pair_count
-        final_score = (avg_similarity * 0.4 + avg_grammar * 0.6)  # Weighted average
+        if stream:
+            return ndjson_response(_stream_conversation(pairs, totals))
         
-        return {
-            "success": True,
-            "average_similarity": round(avg_similarity, 2),
-            "average_grammar": round(avg_grammar, 2),
-            "final_score": round(final_score, 2),
-            "detailed_results": results,
-            "total_pairs": pair_count
-        }
+        results = list(pairs)
+        response = summarize(totals)
+        response["detailed_results"] = results
+        return FastJSONResponse(content=response)
         
     except Exception as e:
         logger.error(f"Conversation evaluation error: {str(e)}", exc_info=True)
-        return {
+        return FastJSONResponse(content={
             "success": False,
             "error": str(e),
             "average_similarity": 0,
             "average_grammar": 0,
             "final_score": 0
-        }
+        })
     
 @app.on_event("startup")
 async def startup_event():
     """Reload corpus on startup"""
     global stats, tag_set
     try:
-        stats = load_corpus(corpus_file)
+        stats = load_model(corpus_model or corpus_file, corpus_min_count, corpus_dtype)
         tag_set = set(stats.tag_count.keys())
         logger.info("Corpus loaded successfully")
     except Exception as e:
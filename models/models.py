@@ -1,5 +1,7 @@
-from dataclasses import dataclass
-from typing import Dict, Tuple, DefaultDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple, DefaultDict
+
+import numpy as np
 
 # models.py
 @dataclass
@@ -15,4 +17,93 @@ class CorpusStats:
             frozenset(self.word_tag_count.items()),
             frozenset(self.tag_transition_count.items()),
             self.total_words
-        ))
\ No newline at end of file
+        ))
+
+class SortedStringTable:
+    """Immutable sorted vocabulary: one UTF-8 blob plus an offsets array.
+
+    Costs a few bytes per word instead of a Python str object per word;
+    lookups are a binary search over the byte-sorted entries.
+    """
+
+    def __init__(self, words):
+        encoded = sorted({w.encode('utf-8') for w in words})
+        self.blob = b''.join(encoded)
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        if encoded:
+            np.cumsum([len(e) for e in encoded], out=self.offsets[1:])
+
+    @classmethod
+    def from_buffers(cls, blob: bytes, offsets: np.ndarray) -> "SortedStringTable":
+        """Rebuild a table from a previously saved blob and offsets array"""
+        table = cls.__new__(cls)
+        table.blob = blob
+        table.offsets = offsets.astype(np.uint32, copy=False)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._entry(i).decode('utf-8')
+
+    def _entry(self, i: int) -> bytes:
+        return self.blob[int(self.offsets[i]):int(self.offsets[i + 1])]
+
+    def index(self, word: str) -> int:
+        """Position of `word` in the table, or -1 if it is not present"""
+        key = word.encode('utf-8')
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = self._entry(mid)
+            if entry < key:
+                lo = mid + 1
+            elif entry > key:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.blob) + self.offsets.nbytes
+
+@dataclass(eq=False)
+class CompactCorpusStats:
+    """Compacted model: log-probability tables instead of raw count dicts.
+
+    Rows of `emission_log_prob` follow `vocab` order, columns follow `tags`.
+    Words pruned by the frequency cutoff share `unknown_log_prob`.
+    """
+    tag_count: Dict[str, int]
+    total_words: int
+    tags: List[str]
+    vocab: SortedStringTable
+    emission_log_prob: np.ndarray
+    unknown_log_prob: np.ndarray
+    transition_log_prob: np.ndarray
+    min_count: int
+    tag_index: Dict[str, int] = field(init=False)
+
+    def __post_init__(self):
+        self.tag_index = {tag: i for i, tag in enumerate(self.tags)}
+
+    def emission_row(self, word: str) -> np.ndarray:
+        """Log P(word | tag) for every tag, falling back to the unknown-word model"""
+        idx = self.vocab.index(word.lower())
+        return self.unknown_log_prob if idx < 0 else self.emission_log_prob[idx]
+
+    def transition(self, prev_tag: str, curr_tag: str) -> float:
+        """Log P(curr_tag | prev_tag); unseen tags get log(1/1) like the count model"""
+        prev_idx = self.tag_index.get(prev_tag)
+        curr_idx = self.tag_index.get(curr_tag)
+        if prev_idx is None or curr_idx is None:
+            return 0.0
+        return float(self.transition_log_prob[prev_idx, curr_idx])
+
+    @property
+    def nbytes(self) -> int:
+        return (self.vocab.nbytes + self.emission_log_prob.nbytes
+                + self.unknown_log_prob.nbytes + self.transition_log_prob.nbytes)
@@ -0,0 +1,258 @@
+"""Offline bulk scoring of JSONL conversation logs.
+
+Usage:
+    python -m services.bulk_score sessions.jsonl scores.jsonl --workers 8
+    python -m services.bulk_score sessions.jsonl scores.jsonl --resume
+
+Each input line is either a conversation (`{"messages": [...]}`, same shape as
+the /evaluate-conversation body) or a single pair (`{"question": ..., "user_answer": ...}`).
+One result line is written per non-blank input line, in input order; every
+result carries the 1-based input `line` number (blank lines are skipped).
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from tqdm import tqdm
+
+from services.conversation import iter_scored_pairs, resolve_fields, select_fields, split_messages, summarize
+from services.language_check import speaking_ability_score
+from utils import fast_json
+from utils.corpus_repo import load_model
+
+logger = logging.getLogger(__name__)
+
+# Field identitas yang disalin apa adanya ke baris hasil
+ID_FIELDS = ('id', 'request_id', 'session_id')
+
+# State per proses worker, diisi oleh _init_worker
+_stats = None
+_tag_set: Set[str] = set()
+
+def _init_worker(corpus_file: str, min_count: Optional[int], dtype: str) -> None:
+    """Load the corpus once per worker process"""
+    global _stats, _tag_set
+    # speaking_ability_score mencetak baris DEBUG per record; buang di worker
+    sys.stdout = open(os.devnull, 'w')
+    _stats = load_model(corpus_file, min_count, dtype)
+    _tag_set = set(_stats.tag_count.keys())
+
+def score_record(record: Dict[str, Any], stats: Any, tag_set: set,
+                 fields: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Score one log record with the same core as the HTTP endpoints"""
+    if 'messages' in record:
+        bot_messages, user_messages = split_messages(record['messages'])
+        if len(bot_messages) != len(user_messages):
+            result = {"success": False, "error": "Jumlah pertanyaan dan jawaban tidak sama"}
+        else:
+            totals = {}
+            results = list(iter_scored_pairs(bot_messages, user_messages, stats, tag_set, fields, totals))
+            result = summarize(totals)
+            result["detailed_results"] = results
+    elif 'question' in record and 'user_answer' in record:
+        result = speaking_ability_score(
+            question=record['question'],
+            user_answer=record['user_answer'],
+            stats=stats,
+            tag_set=tag_set
+        )
+        if 'error' not in result:
+            result = select_fields(result, fields)
+    else:
+        result = {"success": False, "error": "Record needs 'messages' or 'question'/'user_answer'"}
+
+    for key in ID_FIELDS:
+        if key in record:
+            result = {key: record[key], **result}
+    return result
+
+def _score_chunk(lines: List[Tuple[int, bytes]], fields: Optional[Set[str]]) -> Tuple[bytes, int, int]:
+    """Score a chunk of (line number, raw JSONL line); returns (output bytes, records, errors)"""
+    out = []
+    errors = 0
+    for line_no, line in lines:
+        try:
+            result = score_record(fast_json.loads(line), _stats, _tag_set, fields)
+        except Exception as e:
+            result = {"success": False, "error": str(e)}
+        result = {"line": line_no, **result}
+        if result.get("success") is False or "error" in result:
+            errors += 1
+        out.append(fast_json.dumps(result))
+        out.append(b"\n")
+    return b"".join(out), len(lines), errors
+
+def _iter_chunks(src: BinaryIO, chunk_size: int,
+                 first_line: int = 1) -> Iterator[Tuple[List[Tuple[int, bytes]], int, int]]:
+    """Read non-empty lines lazily in chunks; yields (numbered lines, bytes consumed, lines consumed)"""
+    lines: List[Tuple[int, bytes]] = []
+    consumed = 0
+    line_count = 0
+    for line_no, line in enumerate(src, first_line):
+        consumed += len(line)
+        line_count += 1
+        if line.strip():
+            lines.append((line_no, line))
+        if len(lines) >= chunk_size:
+            yield lines, consumed, line_count
+            lines, consumed, line_count = [], 0, 0
+    if lines or consumed:
+        yield lines, consumed, line_count
+
+def _load_checkpoint(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _save_checkpoint(path: str, state: Dict[str, Any]) -> None:
+    """Write the checkpoint atomically so a crash never leaves it half-written"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def bulk_score(input_path: str, output_path: str, corpus_file: str = "corpus.json",
+               workers: Optional[int] = None, chunk_size: int = 64,
+               fields: Optional[Set[str]] = None, checkpoint_path: Optional[str] = None,
+               resume: bool = False, progress: bool = True,
+               min_count: Optional[int] = None, dtype: str = "float32") -> Dict[str, Any]:
+    """Stream `input_path` through a process pool and write results to `output_path`.
+
+    At most `workers * 2` chunks are in flight, so memory stays bounded no
+    matter how large the input is. After every chunk written, the input and
+    output byte offsets are checkpointed; `resume=True` continues from there.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or f"{output_path}.ckpt"
+    max_pending = workers * 2
+
+    input_size = os.path.getsize(input_path)
+    # Parameter yang menentukan isi output; resume hanya boleh jika semuanya sama
+    params = {
+        "input": os.path.abspath(input_path),
+        "input_size": input_size,
+        "corpus": os.path.abspath(corpus_file),
+        "min_count": min_count,
+        "dtype": dtype,
+        "fields": sorted(fields) if fields is not None else None,
+    }
+    fresh_state = {"params": params, "input_offset": 0, "input_lines": 0, "output_offset": 0,
+                   "records": 0, "errors": 0}
+
+    state = dict(fresh_state)
+    if resume and os.path.exists(checkpoint_path):
+        state = _load_checkpoint(checkpoint_path)
+        saved_params = state.get("params", {})
+        mismatched = sorted(k for k in params if saved_params.get(k) != params[k])
+        if mismatched:
+            raise ValueError(f"Cannot resume from {checkpoint_path}, settings do not match "
+                             f"the interrupted run: {', '.join(mismatched)}")
+        logger.info(f"Resuming from record {state['records']} (input byte {state['input_offset']})")
+    elif resume:
+        logger.warning(f"No checkpoint at {checkpoint_path}, starting from the beginning")
+    if state["output_offset"] and not os.path.exists(output_path):
+        logger.warning(f"Output {output_path} is missing, discarding checkpoint")
+        state = dict(fresh_state)
+
+    start_records = state["records"]
+    start_offset = state["input_offset"]
+    started = time.perf_counter()
+
+    output_mode = 'r+b' if state["output_offset"] else 'wb'
+    with open(input_path, 'rb') as src, open(output_path, output_mode) as dst, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(corpus_file, min_count, dtype)) as pool, \
+            tqdm(total=input_size, initial=state["input_offset"], unit='B', unit_scale=True,
+                 desc="scoring", file=sys.stderr, disable=not progress) as bar:
+        src.seek(state["input_offset"])
+        # Buang output yang ditulis setelah checkpoint terakhir
+        dst.seek(state["output_offset"])
+        dst.truncate()
+        _save_checkpoint(checkpoint_path, state)
+
+        pending = deque()
+
+        def drain_one():
+            future, consumed, line_count = pending.popleft()
+            data, records, errors = future.result()
+            dst.write(data)
+            dst.flush()
+            state["input_offset"] += consumed
+            state["input_lines"] += line_count
+            state["output_offset"] = dst.tell()
+            state["records"] += records
+            state["errors"] += errors
+            _save_checkpoint(checkpoint_path, state)
+            bar.update(consumed)
+            elapsed = time.perf_counter() - started
+            bar.set_postfix(records=state["records"],
+                            rps=f"{(state['records'] - start_records) / max(elapsed, 1e-9):.1f}")
+
+        for lines, consumed, line_count in _iter_chunks(src, chunk_size, state["input_lines"] + 1):
+            pending.append((pool.submit(_score_chunk, lines, fields), consumed, line_count))
+            if len(pending) >= max_pending:
+                drain_one()
+        while pending:
+            drain_one()
+
+    elapsed = time.perf_counter() - started
+    scored = state["records"] - start_records
+    read_mb = (state["input_offset"] - start_offset) / 1e6
+    report = {
+        "records": state["records"],
+        "errors": state["errors"],
+        "scored_this_run": scored,
+        "elapsed_seconds": round(elapsed, 2),
+        "records_per_second": round(scored / elapsed, 2) if elapsed else 0.0,
+        "mb_per_second": round(read_mb / elapsed, 2) if elapsed else 0.0,
+    }
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    logger.info(f"Bulk scoring finished: {report}")
+    return report
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score JSONL conversation logs offline")
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("output", help="Output JSONL file (one result per non-blank input line)")
+    parser.add_argument("--corpus", default="corpus.json", help="Corpus used to train the tagger, or a compact .npz model")
+    parser.add_argument("--min-count", type=int, default=None, help="Compact the model, folding rarer words into the unknown-word model")
+    parser.add_argument("--dtype", choices=("float16", "float32", "float64"), default="float32", help="Precision of compacted probability tables")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Records per task sent to a worker")
+    parser.add_argument("--fields", default=None, help="Comma-separated per-pair fields to keep")
+    parser.add_argument("--compact", action="store_true", help="Drop pos_tags and echoed text")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <output>.ckpt)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint")
+    parser.add_argument("--no-progress", action="store_true", help="Disable the progress bar")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        fields = resolve_fields(args.fields, args.compact)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        bulk_score(
+            args.input,
+            args.output,
+            corpus_file=args.corpus,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            fields=fields,
+            checkpoint_path=args.checkpoint,
+            resume=args.resume,
+            progress=not args.no_progress,
+            min_count=args.min_count,
+            dtype=args.dtype
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+if __name__ == "__main__":
+    main()
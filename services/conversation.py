@@ -0,0 +1,92 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from models.models import CorpusStats
+from services.language_check import speaking_ability_score
+
+PAIR_FIELDS = ('question', 'user_answer', 'similarity', 'grammar_score', 'grammar_errors', 'suggestion', 'pos_tags')
+
+# Field yang dibuang pada mode compact: teks yang di-echo dan pos_tags
+COMPACT_DROPPED_FIELDS = {'question', 'user_answer', 'suggestion', 'pos_tags'}
+
+def split_messages(messages: List[Dict[str, str]]) -> Tuple[List[str], List[str]]:
+    """Pisahkan pesan bot (pertanyaan) dan user (jawaban)"""
+    bot_messages = [m['message'] for m in messages if m['role'] == 'bot']
+    user_messages = [m['message'] for m in messages if m['role'] == 'user']
+    return bot_messages, user_messages
+
+def resolve_fields(fields: Optional[str] = None, compact: bool = False) -> Optional[Set[str]]:
+    """Build the set of per-pair fields to keep; None means keep everything"""
+    if fields:
+        selected = {f.strip() for f in fields.split(',') if f.strip()}
+        unknown = selected - set(PAIR_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    elif compact:
+        selected = set(PAIR_FIELDS)
+    else:
+        return None
+    if compact:
+        selected -= COMPACT_DROPPED_FIELDS
+    return selected
+
+def select_fields(row: Dict[str, Any], fields: Optional[Set[str]]) -> Dict[str, Any]:
+    """Keep only the requested per-pair fields"""
+    if fields is None:
+        return row
+    return {k: v for k, v in row.items() if k in fields}
+
+def score_pair(question: str, answer: str, stats: CorpusStats, tag_set: set) -> Dict[str, Any]:
+    """Evaluasi satu pasangan pertanyaan-jawaban"""
+    result = speaking_ability_score(
+        question=question,
+        user_answer=answer,
+        stats=stats,
+        tag_set=tag_set
+    )
+
+    # Pastikan result memiliki nilai default jika None
+    return {
+        'question': question,
+        'user_answer': answer,
+        'similarity': result.get('similarity', 0),
+        'grammar_score': result.get('grammar_score', 0),
+        'grammar_errors': result.get('grammar_errors', []),
+        'suggestion': result.get('suggestion', ''),
+        'pos_tags': result.get('pos_tags', [])
+    }
+
+def iter_scored_pairs(bot_messages: Iterable[str], user_messages: Iterable[str], stats: CorpusStats,
+                      tag_set: set, fields: Optional[Set[str]] = None,
+                      totals: Optional[Dict[str, float]] = None) -> Iterator[Dict[str, Any]]:
+    """Score pairs lazily, accumulating similarity/grammar into `totals`.
+
+    Pairs are yielded one by one so callers can stream them; `totals` always
+    uses the full scores even when `fields` hides them from the output.
+    """
+    if totals is None:
+        totals = {}
+    totals.setdefault('similarity', 0)
+    totals.setdefault('grammar', 0)
+    totals.setdefault('pairs', 0)
+
+    for question, answer in zip(bot_messages, user_messages):
+        row = score_pair(question, answer, stats, tag_set)
+        totals['similarity'] += row['similarity']
+        totals['grammar'] += row['grammar_score']
+        totals['pairs'] += 1
+        yield select_fields(row, fields)
+
+def summarize(totals: Dict[str, float]) -> Dict[str, Any]:
+    """Hitung rata-rata dan skor akhir dari akumulasi iter_scored_pairs"""
+    pair_count = max(1, totals.get('pairs', 0))  # Hindari division by zero
+    avg_similarity = totals.get('similarity', 0) / pair_count
+    avg_grammar = totals.get('grammar', 0) / pair_count
+    final_score = (avg_similarity * 0.4 + avg_grammar * 0.6)  # Weighted average
+
+    return {
+        "success": True,
+        "average_similarity": round(avg_similarity, 2),
+        "average_grammar": round(avg_grammar, 2),
+        "final_score": round(final_score, 2),
+        "total_pairs": pair_count
+    }
@@ -1,6 +1,13 @@
-from typing import List, Tuple, Callable, Any
+from typing import List, Tuple, Callable, Any, Dict, Optional
 from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
 import logging
+import sys
+
+from models.models import CompactCorpusStats, CorpusStats
+from services.viterby_tagger import ViterbiTagger
+from utils.corpus_repo import compact_corpus, load_corpus, save_compact_model
 
 logger = logging.getLogger(__name__)
 
@@ -36,4 +43,66 @@ def evaluate_model(
             correct += res_correct
             total += res_total
     
-    return correct / total if total else 0
\ No newline at end of file
+    return correct / total if total else 0
+
+def model_nbytes(stats: Any) -> int:
+    """Approximate in-memory size of a model's lookup tables"""
+    if isinstance(stats, CompactCorpusStats):
+        return stats.nbytes
+    total = 0
+    for table in (stats.tag_count, stats.word_tag_count, stats.tag_transition_count):
+        total += sys.getsizeof(table)
+        for key, value in table.items():
+            total += sys.getsizeof(key) + sys.getsizeof(value)
+            if isinstance(key, tuple):
+                total += sum(sys.getsizeof(part) for part in key)
+    return total
+
+def _predict(words: List[str], tag_set: Any, stats: Any) -> List[str]:
+    # Tagger baru per kalimat: cache-nya tidak aman dipakai bersama antar thread
+    return ViterbiTagger().viterbi(words, tag_set, stats)
+
+def compaction_report(
+    test_sentences: List[List[Tuple[str, str]]],
+    stats: CorpusStats,
+    compact_stats: CompactCorpusStats,
+    workers: int = 4
+) -> Dict[str, Any]:
+    """Compare size and tagging accuracy before and after compaction"""
+    tag_set = set(stats.tag_count.keys())
+    bytes_before = model_nbytes(stats)
+    bytes_after = model_nbytes(compact_stats)
+    return {
+        "min_count": compact_stats.min_count,
+        "dtype": str(compact_stats.emission_log_prob.dtype),
+        "vocab_before": len({word for word, _ in stats.word_tag_count}),
+        "vocab_after": len(compact_stats.vocab),
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "size_ratio": round(bytes_after / bytes_before, 4) if bytes_before else 0.0,
+        "accuracy_before": evaluate_model(_predict, test_sentences, stats, tag_set, workers),
+        "accuracy_after": evaluate_model(_predict, test_sentences, compact_stats, tag_set, workers),
+    }
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Report the size/accuracy trade-off of model compaction")
+    parser.add_argument("corpus", help="Training corpus (JSON list of tagged sentences)")
+    parser.add_argument("--test", default=None, help="Held-out tagged sentences (default: the training corpus)")
+    parser.add_argument("--min-count", type=int, default=2, help="Fold words seen fewer times into the unknown-word model")
+    parser.add_argument("--dtype", choices=("float16", "float32", "float64"), default="float32")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--save", default=None, help="Write the compacted model to this .npz file")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with open(args.test or args.corpus, 'r', encoding='utf-8') as f:
+        test_sentences = json.load(f)
+    stats = load_corpus(args.corpus)
+    compact_stats = compact_corpus(stats, min_count=args.min_count, dtype=args.dtype)
+    print(json.dumps(compaction_report(test_sentences, stats, compact_stats, args.workers), indent=2))
+    if args.save:
+        save_compact_model(compact_stats, args.save)
+        logger.info(f"Compact model saved to {args.save}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import math
 from typing import List, Dict, Any, Tuple
 import logging
 
+from models.models import CompactCorpusStats
+
 logger = logging.getLogger(__name__)
 
 class ViterbiTagger:
@@ -13,12 +15,23 @@ class ViterbiTagger:
         """Manual caching for transition probabilities"""
         cache_key = (prev_tag, curr_tag)
         if cache_key not in self._transition_cache:
-            count = stats.tag_transition_count.get(cache_key, 1)
-            total = stats.tag_count.get(prev_tag, 1)
-            self._transition_cache[cache_key] = math.log(count / total)
+            if isinstance(stats, CompactCorpusStats):
+                self._transition_cache[cache_key] = stats.transition(prev_tag, curr_tag)
+            else:
+                count = stats.tag_transition_count.get(cache_key, 1)
+                total = stats.tag_count.get(prev_tag, 1)
+                self._transition_cache[cache_key] = math.log(count / total)
         return self._transition_cache[cache_key]
 
     def get_emission_prob(self,word: str, tag: str, stats: Any) -> float:
+        if isinstance(stats, CompactCorpusStats):
+            cache_key = (word, tag)
+            if cache_key not in self._emission_cache:
+                # Satu lookup vocabulary mengisi cache untuk semua tag kata ini
+                row = stats.emission_row(word)
+                for t, idx in stats.tag_index.items():
+                    self._emission_cache[(word, t)] = float(row[idx])
+            return self._emission_cache.get(cache_key, math.log(1e-6))
     # Beri probabilitas kecil untuk kata yang tidak dikenal
         if (word.lower(), tag) not in stats.word_tag_count:
             return math.log(1e-6)  # Nilai sangat kecil
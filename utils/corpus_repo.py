@@ -1,8 +1,11 @@
 from collections import defaultdict
-from models.models import CorpusStats
+from models.models import CompactCorpusStats, CorpusStats, SortedStringTable
 import json
 import logging
-from typing import Dict, Tuple, List
+import math
+from typing import Dict, Tuple, List, Optional, Union
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -41,4 +44,104 @@ def load_corpus(file_path: str) -> CorpusStats:
         raise
     except Exception as e:
         logger.error(f"Error loading corpus: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def compact_corpus(stats: CorpusStats, min_count: int = 1, dtype: str = "float32") -> CompactCorpusStats:
+    """Convert count dicts into reduced-precision log-probability tables.
+
+    Words seen fewer than `min_count` times are dropped from the vocabulary and
+    their counts are folded into a per-tag unknown-word distribution. With
+    min_count=1 and dtype="float64" the tags match the count model exactly;
+    float32/float16 match only up to ties broken differently by rounding.
+    """
+    if dtype not in ("float16", "float32", "float64"):
+        raise ValueError(f"Unsupported dtype: {dtype}")
+
+    unseen_log_prob = math.log(1e-6)  # Sama dengan nilai untuk pasangan yang tidak dikenal
+    tags = sorted(stats.tag_count)
+    tag_index = {tag: i for i, tag in enumerate(tags)}
+
+    word_freq = defaultdict(int)
+    for (word, _), count in stats.word_tag_count.items():
+        word_freq[word] += count
+
+    vocab = SortedStringTable(w for w, freq in word_freq.items() if freq >= min_count)
+    word_index = {w: i for i, w in enumerate(vocab)}
+
+    emission = np.full((len(vocab), len(tags)), unseen_log_prob, dtype=dtype)
+    rare_count = np.zeros(len(tags), dtype=np.float64)
+    for (word, tag), count in stats.word_tag_count.items():
+        if word in word_index:
+            emission[word_index[word], tag_index[tag]] = math.log(count / stats.tag_count.get(tag, 1))
+        else:
+            rare_count[tag_index[tag]] += count
+
+    tag_total = np.array([stats.tag_count[tag] for tag in tags], dtype=np.float64)
+    unknown = np.full(len(tags), unseen_log_prob, dtype=np.float64)
+    folded = rare_count > 0
+    unknown[folded] = np.log(rare_count[folded] / tag_total[folded])
+
+    # Transisi yang tidak pernah muncul tetap dihitung sebagai count 1
+    transition = np.log(1.0 / tag_total)[:, None].repeat(len(tags), axis=1)
+    for (prev_tag, curr_tag), count in stats.tag_transition_count.items():
+        if prev_tag in tag_index and curr_tag in tag_index:
+            transition[tag_index[prev_tag], tag_index[curr_tag]] = math.log(count / stats.tag_count[prev_tag])
+
+    logger.info(f"Compacted vocabulary {len(word_freq)} -> {len(vocab)} words (min_count={min_count}, {dtype})")
+    return CompactCorpusStats(
+        tag_count=dict(stats.tag_count),
+        total_words=stats.total_words,
+        tags=tags,
+        vocab=vocab,
+        emission_log_prob=emission,
+        unknown_log_prob=unknown.astype(dtype),
+        transition_log_prob=transition.astype(dtype),
+        min_count=min_count
+    )
+
+def save_compact_model(stats: CompactCorpusStats, file_path: str) -> None:
+    """Save a compacted model as a .npz archive loadable without the corpus"""
+    np.savez(
+        file_path,
+        tags=np.array(stats.tags),
+        tag_totals=np.array([stats.tag_count[tag] for tag in stats.tags], dtype=np.int64),
+        total_words=np.int64(stats.total_words),
+        min_count=np.int64(stats.min_count),
+        vocab_blob=np.frombuffer(stats.vocab.blob, dtype=np.uint8),
+        vocab_offsets=stats.vocab.offsets,
+        emission_log_prob=stats.emission_log_prob,
+        unknown_log_prob=stats.unknown_log_prob,
+        transition_log_prob=stats.transition_log_prob
+    )
+
+def load_compact_model(file_path: str) -> CompactCorpusStats:
+    """Load a model saved by save_compact_model, skipping the count dicts entirely"""
+    try:
+        with np.load(file_path, allow_pickle=False) as data:
+            tags = [str(tag) for tag in data["tags"]]
+            return CompactCorpusStats(
+                tag_count=dict(zip(tags, (int(c) for c in data["tag_totals"]))),
+                total_words=int(data["total_words"]),
+                tags=tags,
+                vocab=SortedStringTable.from_buffers(data["vocab_blob"].tobytes(), data["vocab_offsets"]),
+                emission_log_prob=data["emission_log_prob"],
+                unknown_log_prob=data["unknown_log_prob"],
+                transition_log_prob=data["transition_log_prob"],
+                min_count=int(data["min_count"])
+            )
+    except FileNotFoundError:
+        logger.error(f"Compact model file not found: {file_path}")
+        raise
+    except Exception as e:
+        logger.error(f"Error loading compact model: {e}")
+        raise
+
+def load_model(file_path: str, min_count: Optional[int] = None,
+               dtype: str = "float32") -> Union[CorpusStats, CompactCorpusStats]:
+    """Load a saved compact model (.npz) or the corpus, compacting it when a frequency cutoff is given"""
+    if file_path.endswith(".npz"):
+        return load_compact_model(file_path)
+    stats = load_corpus(file_path)
+    if min_count is None:
+        return stats
+    return compact_corpus(stats, min_count=min_count, dtype=dtype)
@@ -0,0 +1,22 @@
+from typing import Any, Iterable
+
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from utils import fast_json
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (falls back to compact stdlib json).
+
+    Return it directly from an endpoint so FastAPI skips jsonable_encoder.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return fast_json.dumps(content)
+
+def ndjson_response(rows: Iterable[Any], status_code: int = 200) -> StreamingResponse:
+    """Stream every item of `rows` as one JSON document per line"""
+    def generate():
+        for row in rows:
+            yield fast_json.dumps(row) + b"\n"
+
+    return StreamingResponse(generate(), status_code=status_code, media_type="application/x-ndjson")